@@ -18,6 +18,21 @@ AGENT_MODEL = os.getenv(
 )
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Optional tuning knobs read by the MCP server and the edit scripts it runs; passed
+# through only when set so their defaults apply otherwise
+MCP_SERVER_TUNING_ENV = (
+    "VIDEO_CODEC",
+    "X264_PRESET",
+    "MEDIA_CACHE_DIR",
+    "MEDIA_CACHE_MAX_BYTES",
+    "ANALYSIS_PROXY_HEIGHT",
+    "ANALYSIS_PROXY_CACHE_MAX_BYTES",
+    "ANALYSIS_PROXY_TIMEOUT_SECONDS",
+    "MIN_SCRIPT_TIMEOUT_SECONDS",
+    "SCRIPT_TIMEOUT_SECONDS_PER_MEDIA_SECOND",
+    "MINIO_PART_SIZE",
+)
+
 # Initialize MCP client with multiple servers
 mcp_client = MultiServerMCPClient(
     {
@@ -35,6 +50,7 @@ mcp_client = MultiServerMCPClient(
                 "LANGSMITH_TRACING": os.getenv("LANGSMITH_TRACING"),
                 "LANGSMITH_API_KEY": os.getenv("LANGSMITH_API_KEY"),
                 "LANGSMITH_PROJECT": os.getenv("LANGSMITH_PROJECT"),
+                **{name: os.environ[name] for name in MCP_SERVER_TUNING_ENV if name in os.environ},
             },
         },
     }
@@ -3,6 +3,14 @@
 from abc import ABC, abstractmethod
 
 
+class StorageServiceError(Exception):
+    """Base exception for storage service errors."""
+
+
+class StorageFileNotFoundError(StorageServiceError):
+    """Raised when the requested object does not exist in storage."""
+
+
 class StorageService(ABC):
     """Abstract interface for a storage service."""
 
@@ -10,6 +18,10 @@ class StorageService(ABC):
     def download_file_to_temp(self, object_name: str, local_path: str | None = None) -> str:
         """Downloads a file to a temporary location."""
 
+    @abstractmethod
+    def download_file_to_bytes(self, object_name: str) -> bytes:
+        """Downloads a file into memory."""
+
     @abstractmethod
     def upload_file_from_path(
         self, local_path: str, object_name: str, content_type: str = "application/octet-stream"
@@ -26,6 +38,10 @@ class StorageService(ABC):
     def list_all_files(self) -> list[str]:
         """Lists all files."""
 
+    @abstractmethod
+    def list_all_files_with_info(self) -> list[dict]:
+        """Lists all files along with their size, last modified date and etag."""
+
     @abstractmethod
     def file_exists(self, object_name: str) -> bool:
         """Checks if a file exists."""
@@ -6,13 +6,39 @@ import json
 import logging
 import mimetypes
 import os
+from collections import OrderedDict
 
 from google.api_core import exceptions
 from interfaces.llm_service_interface import LLMService
-from interfaces.storage_service_interface import StorageService
+from interfaces.storage_service_interface import (
+    StorageFileNotFoundError,
+    StorageService,
+    StorageServiceError,
+)
 from langchain_core.messages import HumanMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+# Maximum number of media files downloaded in parallel for a single analysis
+MAX_CONCURRENT_DOWNLOADS = 4
+
+# Videos are sent to the model as a 1 fps proxy of at most this height (0 disables);
+# the model samples video at about 1 fps, so the extra frames and pixels only cost upload time
+ANALYSIS_PROXY_HEIGHT = int(os.getenv("ANALYSIS_PROXY_HEIGHT", "480"))
+
+# Memory budget for analysis proxies kept for reuse across analyses of the same video
+ANALYSIS_PROXY_CACHE_MAX_BYTES = int(
+    os.getenv("ANALYSIS_PROXY_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+)
+
+# Limit on making one analysis proxy; a stalled read from storage gives up much sooner
+ANALYSIS_PROXY_TIMEOUT_SECONDS = int(os.getenv("ANALYSIS_PROXY_TIMEOUT_SECONDS", "600"))
+ANALYSIS_PROXY_READ_TIMEOUT_SECONDS = 30
+
+
+def _encode_base64(data: bytes) -> str:
+    """Returns data base64-encoded as text."""
+    return base64.b64encode(data).decode("ascii")
+
 
 class GeminiService(LLMService):
     """Implementation of the LLMService using Google's Gemini."""
@@ -33,6 +59,10 @@ class GeminiService(LLMService):
         # --- Initialize the LangChain LLM ---
         self.llm = ChatGoogleGenerativeAI(model=self.model_name, google_api_key=self.gemini_api_key)
 
+        # (object name, etag) -> proxy bytes, least recently used first
+        self._proxy_cache: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._proxy_cache_bytes = 0
+
         logging.info("GeminiService initialized with model: %s", self.model_name)
 
     async def analyze_media_files(
@@ -41,61 +71,29 @@ class GeminiService(LLMService):
         """Analyzes media files with a given prompt using the Gemini model via LangChain."""
 
         # --- Prepare the multimodal content for LangChain ---
+        # Files are fetched concurrently; gather keeps them in the requested order
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+        async def prepare(filename: str):
+            async with semaphore:
+                return await self._prepare_media_part(filename, source_directory)
+
+        results = await asyncio.gather(
+            *(prepare(filename) for filename in media_filenames), return_exceptions=True
+        )
+
         content = [{"type": "text", "text": prompt}]
         processed_files = 0
         not_found_files = []
-
-        for filename in media_filenames:
-            temp_path = None
-            try:
-                object_name = f"{source_directory}/{filename}"
-                if not self.storage_service.file_exists(object_name):
-                    logging.warning("Media file not found in storage: %s", object_name)
-                    not_found_files.append(filename)
-                    continue
-
-                logging.info("Downloading '%s' from storage...", filename)
-                temp_path = await asyncio.to_thread(
-                    self.storage_service.download_file_to_temp, object_name
-                )
-
-                # --- Read file, encode, and add to content list ---
-                with open(temp_path, "rb") as media_file:
-                    encoded_data = base64.b64encode(media_file.read()).decode("utf-8")
-
-                mime_type, _ = mimetypes.guess_type(temp_path)
-                if not mime_type or not mime_type.startswith(
-                    ("video/", "audio/", "image/", "text/")
-                ):
-                    continue  # Default fallback (skip unsupported file)
-
-                logging.info("Adding '%s' to the request with MIME type '%s'", filename, mime_type)
-
-                if mime_type.startswith("image/"):
-                    content.append(
-                        {
-                            "type": "image_url",
-                            "filename": filename,
-                            "image_url": f"data:{mime_type};base64,{encoded_data}",
-                            "mime_type": mime_type,
-                        }
-                    )
-                else:  # For video, audio, etc.
-                    content.append(
-                        {
-                            "type": "media",
-                            "filename": filename,
-                            "data": encoded_data,
-                            "mime_type": mime_type,
-                        }
-                    )
+        for filename, result in zip(media_filenames, results):
+            if isinstance(result, StorageFileNotFoundError):
+                not_found_files.append(filename)
+            elif isinstance(result, BaseException):
+                raise result
+            elif result is not None:
+                content.append(result)
                 processed_files += 1
 
-            finally:
-                # Clean up the temporary file immediately
-                if temp_path and os.path.exists(temp_path):
-                    os.unlink(temp_path)
-
         # --- Handle cases where no files could be processed ---
         if processed_files == 0:
             error_msg = "Analysis could not be performed. "
@@ -124,3 +122,146 @@ class GeminiService(LLMService):
         except RuntimeError as e:
             logging.exception("An unexpected error occurred: %s", e)
             return json.dumps({"error": str(e)})
+
+    async def _prepare_media_part(self, filename: str, source_directory: str) -> dict | None:
+        """
+        Downloads a media file and returns it as a LangChain content part, or None if
+        the file type is unsupported. Raises StorageFileNotFoundError for missing files.
+        """
+        object_name = f"{source_directory}/{filename}"
+        mime_type, _ = mimetypes.guess_type(filename)
+        if not mime_type or not mime_type.startswith(("video/", "audio/", "image/", "text/")):
+            return None  # Default fallback (skip unsupported file)
+
+        data = None
+        if mime_type.startswith("video/") and ANALYSIS_PROXY_HEIGHT > 0:
+            data = await self._get_analysis_proxy(object_name)
+            if data is not None:
+                mime_type = "video/mp4"
+
+        if data is None:
+            logging.info("Downloading '%s' from storage...", filename)
+            try:
+                data = await asyncio.to_thread(
+                    self.storage_service.download_file_to_bytes, object_name
+                )
+            except StorageFileNotFoundError:
+                logging.warning("Media file not found in storage: %s", object_name)
+                raise
+
+        # --- Encode and build the content part ---
+        encoded_data = await asyncio.to_thread(_encode_base64, data)
+
+        logging.info("Adding '%s' to the request with MIME type '%s'", filename, mime_type)
+        if mime_type.startswith("image/"):
+            return {
+                "type": "image_url",
+                "filename": filename,
+                "image_url": f"data:{mime_type};base64,{encoded_data}",
+                "mime_type": mime_type,
+            }
+        # For video, audio, etc.
+        return {
+            "type": "media",
+            "filename": filename,
+            "data": encoded_data,
+            "mime_type": mime_type,
+        }
+
+    async def _get_analysis_proxy(self, object_name: str) -> bytes | None:
+        """
+        Returns the analysis proxy of a video, reusing one made from the same version
+        of the object (same etag) when it is still cached.
+        """
+        try:
+            file_info = await asyncio.to_thread(self.storage_service.get_file_info, object_name)
+        except StorageServiceError as e:
+            logging.warning("Could not look up '%s' for its analysis proxy: %s", object_name, e)
+            return None
+
+        key = (object_name, file_info["etag"])
+        proxy = self._proxy_cache.get(key)
+        if proxy is not None:
+            logging.debug("Reusing cached analysis proxy for '%s'", object_name)
+            self._proxy_cache.move_to_end(key)
+            return proxy
+
+        proxy = await self._create_analysis_proxy(object_name)
+        # A proxy larger than the whole budget would only evict everything else
+        if (
+            proxy is not None
+            and key not in self._proxy_cache
+            and len(proxy) <= ANALYSIS_PROXY_CACHE_MAX_BYTES
+        ):
+            self._proxy_cache[key] = proxy
+            self._proxy_cache_bytes += len(proxy)
+            while self._proxy_cache_bytes > ANALYSIS_PROXY_CACHE_MAX_BYTES:
+                _, evicted = self._proxy_cache.popitem(last=False)
+                self._proxy_cache_bytes -= len(evicted)
+        return proxy
+
+    async def _create_analysis_proxy(self, object_name: str) -> bytes | None:
+        """
+        Transcodes a stored video into a small, low frame rate MP4 for analysis,
+        reading it from a presigned URL. Returns None if the proxy can't be made.
+        """
+        try:
+            url = await asyncio.to_thread(self.storage_service.get_file_url, object_name)
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-nostdin",
+                "-v",
+                "error",
+                "-rw_timeout",
+                str(ANALYSIS_PROXY_READ_TIMEOUT_SECONDS * 1_000_000),
+                "-i",
+                url,
+                "-vf",
+                f"scale=-2:'trunc(min({ANALYSIS_PROXY_HEIGHT},ih)/2)*2',fps=1",
+                "-c:v",
+                "libx264",
+                "-preset",
+                "veryfast",
+                "-crf",
+                "28",
+                "-c:a",
+                "aac",
+                "-ac",
+                "1",
+                "-b:a",
+                "64k",
+                "-movflags",
+                "frag_keyframe+empty_moov",
+                "-f",
+                "mp4",
+                "pipe:1",
+                # stdin is the MCP stdio channel; ffmpeg must not read protocol bytes as keys
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(), timeout=ANALYSIS_PROXY_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logging.warning(
+                "Analysis proxy for '%s' timed out after %d seconds",
+                object_name,
+                ANALYSIS_PROXY_TIMEOUT_SECONDS,
+            )
+            process.kill()
+            await process.wait()
+            return None
+        except (StorageServiceError, OSError) as e:
+            logging.warning("Could not create analysis proxy for '%s': %s", object_name, e)
+            return None
+
+        if process.returncode != 0:
+            logging.warning(
+                "Could not create analysis proxy for '%s': %s",
+                object_name,
+                stderr.decode(errors="replace").strip(),
+            )
+            return None
+        logging.info("Created %d byte analysis proxy for '%s'", len(stdout), object_name)
+        return stdout
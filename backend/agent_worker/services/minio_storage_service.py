@@ -7,17 +7,26 @@ import tempfile
 import time
 from typing import Dict, List
 
-from interfaces.storage_service_interface import StorageService
+from interfaces.storage_service_interface import (
+    StorageFileNotFoundError,
+    StorageService,
+    StorageServiceError,
+)
 from minio import Minio
 from minio.error import S3Error
 
-# Using default logging module
+# Multipart upload part size; larger parts mean fewer round-trips for big videos
+MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", str(64 * 1024 * 1024)))
 
 
-class MinioServiceError(Exception):
+class MinioServiceError(StorageServiceError):
     """Custom exception for MinIO service errors."""
 
 
+class MinioFileNotFoundError(MinioServiceError, StorageFileNotFoundError):
+    """Raised when the requested object does not exist in MinIO."""
+
+
 class MinioStorageService(StorageService):
     """Implementation of the StorageService for MinIO."""
 
@@ -80,11 +89,39 @@ class MinioStorageService(StorageService):
                 duration,
             )
             return temp_path
+        except S3Error as e:
+            logging.exception("Failed to download '%s': %s", object_name, e)
+            if not local_path and temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+            if e.code == "NoSuchKey":
+                raise MinioFileNotFoundError(f"File not found: {object_name}") from e
+            raise MinioServiceError(f"Failed to download file: {str(e)}") from e
+
+    def download_file_to_bytes(self, object_name: str) -> bytes:
+        """Downloads a file from MinIO into memory."""
+        start_time = time.perf_counter()
+        response = None
+        try:
+            logging.debug("Downloading '%s' into memory...", object_name)
+            response = self.minio_client.get_object(self.minio_bucket_name, object_name)
+            data = response.read()
+            duration = time.perf_counter() - start_time
+            logging.info(
+                "Successfully downloaded %d bytes from '%s' in %.2f seconds",
+                len(data),
+                object_name,
+                duration,
+            )
+            return data
         except S3Error as e:
             logging.exception("Failed to download '%s': %s", object_name, e)
             if e.code == "NoSuchKey":
-                raise MinioServiceError(f"File not found: {object_name}") from e
+                raise MinioFileNotFoundError(f"File not found: {object_name}") from e
             raise MinioServiceError(f"Failed to download file: {str(e)}") from e
+        finally:
+            if response:
+                response.close()
+                response.release_conn()
 
     def upload_file_from_path(
         self, local_path: str, object_name: str, content_type: str = "application/octet-stream"
@@ -94,7 +131,11 @@ class MinioStorageService(StorageService):
         try:
             logging.debug("Uploading '%s' to '%s'...", local_path, object_name)
             self.minio_client.fput_object(
-                self.minio_bucket_name, object_name, local_path, content_type=content_type
+                self.minio_bucket_name,
+                object_name,
+                local_path,
+                content_type=content_type,
+                part_size=MINIO_PART_SIZE,
             )
             duration = time.perf_counter() - start_time
             logging.info(
@@ -154,6 +195,32 @@ class MinioStorageService(StorageService):
             logging.exception("Failed to list files in bucket '%s': %s", self.minio_bucket_name, e)
             raise MinioServiceError(f"Failed to list files: {str(e)}") from e
 
+    def list_all_files_with_info(self) -> List[Dict]:
+        """Lists all files in the bucket with the metadata returned by the listing."""
+        start_time = time.perf_counter()
+        try:
+            logging.debug("Listing all files with info in bucket '%s'...", self.minio_bucket_name)
+            files = [
+                {
+                    "object_name": obj.object_name,
+                    "size": obj.size,
+                    "last_modified": obj.last_modified,
+                    "etag": obj.etag,
+                }
+                for obj in self.minio_client.list_objects(self.minio_bucket_name, recursive=True)
+            ]
+            duration = time.perf_counter() - start_time
+            logging.info(
+                "Found %d files in bucket '%s' in %.2f seconds.",
+                len(files),
+                self.minio_bucket_name,
+                duration,
+            )
+            return files
+        except S3Error as e:
+            logging.exception("Failed to list files in bucket '%s': %s", self.minio_bucket_name, e)
+            raise MinioServiceError(f"Failed to list files: {str(e)}") from e
+
     def file_exists(self, object_name: str) -> bool:
         """Checks if a file exists in MinIO."""
         try:
@@ -178,7 +245,7 @@ class MinioStorageService(StorageService):
         except S3Error as e:
             logging.exception("Failed to delete '%s': %s", object_name, e)
             if e.code == "NoSuchKey":
-                raise MinioServiceError(f"File not found: {object_name}") from e
+                raise MinioFileNotFoundError(f"File not found: {object_name}") from e
             raise MinioServiceError(f"Failed to delete file: {str(e)}") from e
 
     def get_file_info(self, object_name: str) -> Dict:
@@ -196,7 +263,7 @@ class MinioStorageService(StorageService):
         except S3Error as e:
             logging.exception("Failed to get file info for '%s': %s", object_name, e)
             if e.code == "NoSuchKey":
-                raise MinioServiceError(f"File not found: {object_name}") from e
+                raise MinioFileNotFoundError(f"File not found: {object_name}") from e
             raise MinioServiceError(f"Failed to get file info: {str(e)}") from e
 
     def get_file_url(self, object_name: str, expires_in_seconds: int = 3600) -> str:
@@ -215,5 +282,5 @@ class MinioStorageService(StorageService):
         except S3Error as e:
             logging.exception("Failed to generate URL for '%s': %s", object_name, e)
             if e.code == "NoSuchKey":
-                raise MinioServiceError(f"File not found: {object_name}") from e
+                raise MinioFileNotFoundError(f"File not found: {object_name}") from e
             raise MinioServiceError(f"Failed to generate URL: {str(e)}") from e
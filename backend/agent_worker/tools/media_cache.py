@@ -0,0 +1,155 @@
+"""
+Local cache of media files downloaded from storage.
+
+Edit scripts are usually executed many times against the same inputs while the
+agent iterates on an edit. Inputs are kept in a content-addressed cache (keyed by
+the object's etag) and copied into each job's working directory, so repeated
+executions don't download the same media again. A first use downloads straight into
+the job and only fills the cache afterwards, unless a reflink makes that free.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from functools import partial
+from typing import Callable
+
+from interfaces.storage_service_interface import StorageService
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "media-cache"))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
+
+# Linux ioctl request that clones a file's extents into another file (reflink)
+_FICLONE = 0x40049409
+
+
+def stage_media_file(
+    storage_service: StorageService, object_name: str, local_path: str
+) -> Callable[[], None] | None:
+    """
+    Places the content of a stored object at local_path, from the cache when it holds
+    the current version. A miss is downloaded straight to local_path and reflinked into
+    the cache; where reflinks aren't supported, the returned callable copies it into
+    the cache instead and should be run once the job is done with the file.
+    """
+    etag = storage_service.get_file_info(object_name)["etag"]
+    if not etag:
+        storage_service.download_file_to_temp(object_name, local_path)
+        return None
+
+    cache_path = os.path.join(MEDIA_CACHE_DIR, etag + os.path.splitext(object_name)[1])
+    try:
+        os.utime(cache_path)  # Mark as recently used
+        clone_or_copy(cache_path, local_path)
+        logging.debug("Media cache hit for '%s'", object_name)
+        return None
+    except FileNotFoundError:
+        logging.debug("Media cache miss for '%s'", object_name)
+
+    storage_service.download_file_to_temp(object_name, local_path)
+    try:
+        if add_to_cache(local_path, cache_path, copy=False):
+            return None
+        return partial(cache_staged_file, local_path, cache_path, os.stat(local_path).st_mtime_ns)
+    except OSError as e:
+        logging.warning("Failed to cache '%s': %s", object_name, e)
+        return None
+
+
+def cache_staged_file(local_path: str, cache_path: str, mtime_ns: int):
+    """Copies a staged download into the cache, unless the job modified it in place."""
+    try:
+        if os.stat(local_path).st_mtime_ns != mtime_ns:
+            logging.debug("Not caching '%s': modified by the job", local_path)
+            return
+        add_to_cache(local_path, cache_path, copy=True)
+    except OSError as e:
+        logging.warning("Failed to cache '%s': %s", local_path, e)
+
+
+def add_to_cache(local_path: str, cache_path: str, copy: bool) -> bool:
+    """
+    Publishes a copy of local_path as cache_path. Without copy, only a reflink is
+    attempted; returns False if the file wasn't added.
+    """
+    os.makedirs(MEDIA_CACHE_DIR, exist_ok=True)
+    partial_path = f"{cache_path}.{uuid.uuid4().hex}.part"
+    try:
+        if not clone_file(local_path, partial_path):
+            if not copy:
+                return False
+            shutil.copyfile(local_path, partial_path)
+        os.replace(partial_path, cache_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+    evict_media_cache()
+    return True
+
+
+def clone_or_copy(src: str, dst: str):
+    """
+    Copies src to dst. On copy-on-write filesystems (btrfs, XFS with reflink) the
+    file is reflinked, which takes constant time. Hard links are never used: a
+    script that rewrites an input in place would corrupt the cached copy.
+    """
+    if not clone_file(src, dst):
+        shutil.copyfile(src, dst)
+
+
+def clone_file(src: str, dst: str) -> bool:
+    """Reflinks src to dst. Returns False if the filesystem doesn't support it."""
+    if fcntl is None:
+        return False
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+            return True
+        except OSError:
+            pass  # Filesystem doesn't support reflinks
+    os.unlink(dst)
+    return False
+
+
+def evict_media_cache():
+    """
+    Deletes the least recently used cache entries until the cache fits its budget.
+    Never raises: entries that vanish or can't be removed are skipped.
+    """
+    entries = []
+    try:
+        with os.scandir(MEDIA_CACHE_DIR) as scanned:
+            for entry in scanned:
+                # In-progress downloads, including MinIO's own "<name>.part.minio" files
+                if ".part" in entry.name:
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                except OSError:
+                    continue  # Evicted concurrently by another job
+    except OSError as e:
+        logging.warning("Failed to scan media cache %s: %s", MEDIA_CACHE_DIR, e)
+        return
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= MEDIA_CACHE_MAX_BYTES:
+            break
+        try:
+            os.unlink(path)
+            logging.debug("Evicted '%s' from the media cache", path)
+        except FileNotFoundError:
+            pass  # Evicted concurrently by another job
+        except OSError as e:
+            logging.warning("Failed to evict media cache entry %s: %s", path, e)
+            continue
+        total_size -= size
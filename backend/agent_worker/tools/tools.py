@@ -6,39 +6,157 @@ import asyncio
 import json
 import logging
 import os
+import signal
 import tempfile
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import suppress
+from typing import Callable, List
 
 from interfaces.llm_service_interface import LLMService
-from interfaces.storage_service_interface import StorageService
-from services.gemini_service import GeminiService
-from services.minio_storage_service import MinioServiceError, MinioStorageService
+from interfaces.storage_service_interface import StorageService, StorageServiceError
+from services.minio_storage_service import MinioStorageService
 
-from .utils import categorize_and_enrich_files, cleanup_temp_files, sort_media_files
+from .media_cache import stage_media_file
+from .utils import (
+    categorize_and_enrich_files,
+    cleanup_temp_dir,
+    probe_media_duration,
+    read_stream_tail,
+    sort_media_files,
+)
 
 
 class ServiceManager:
     """Manages service instances with lazy initialization."""
 
     def __init__(self):
-        self._storage_service = MinioStorageService()
+        self._storage_service = None
         self._llm_service = None
+        self._storage_lock = asyncio.Lock()
+        self._llm_lock = asyncio.Lock()
 
-    @property
-    def storage_service(self) -> StorageService:
-        """Get the storage service instance."""
+    async def get_storage_service(self) -> StorageService:
+        """Get the storage service instance, creating it off the event loop if needed."""
+        async with self._storage_lock:
+            if self._storage_service is None:
+                self._storage_service = await asyncio.to_thread(MinioStorageService)
         return self._storage_service
 
-    @property
-    def llm_service(self) -> LLMService:
-        """Get the LLM service instance, creating it if needed."""
-        if self._llm_service is None:
-            self._llm_service = GeminiService(self._storage_service)
+    async def get_llm_service(self) -> LLMService:
+        """Get the LLM service instance, creating it off the event loop if needed."""
+        async with self._llm_lock:
+            if self._llm_service is None:
+                storage_service = await self.get_storage_service()
+                self._llm_service = await asyncio.to_thread(_create_llm_service, storage_service)
         return self._llm_service
 
 
+def _create_llm_service(storage_service: StorageService) -> LLMService:
+    """Creates the LLM service; blocking, so it runs in a worker thread."""
+    # Imported here: the LangChain/Gemini stack is slow to import and only
+    # the analysis tool needs it
+    from services.gemini_service import GeminiService
+
+    return GeminiService(storage_service)
+
+
 services = ServiceManager()
 
+# Maximum number of files downloaded in parallel for a single script execution
+MAX_CONCURRENT_DOWNLOADS = 4
+
+# Only the end of a script's stdout/stderr is kept (FFmpeg logs can be very long)
+MAX_SCRIPT_OUTPUT_BYTES = 64 * 1024
+
+# Script runs get a deadline of this many seconds per second of input media, with a
+# floor for short jobs; generous enough for slow x265 encodes on a few cores (0 disables)
+SCRIPT_TIMEOUT_SECONDS_PER_MEDIA_SECOND = float(
+    os.getenv("SCRIPT_TIMEOUT_SECONDS_PER_MEDIA_SECOND", "20")
+)
+MIN_SCRIPT_TIMEOUT_SECONDS = float(os.getenv("MIN_SCRIPT_TIMEOUT_SECONDS", "900"))
+
+# How long a storage listing is reused before MinIO is listed again
+LISTING_CACHE_TTL_SECONDS = 3.0
+
+# (monotonic timestamp, listed files) of the most recent storage listing
+_listing_cache: tuple[float, list[dict]] | None = None
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _on_background_task_done(task: asyncio.Task):
+    """Releases a finished background task and logs any error it raised."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.error("Background task failed: %s", task.exception())
+
+
+def _download_job_files(
+    storage_service: StorageService, downloads: list[tuple[str, str, bool]]
+) -> list[Callable[[], None]]:
+    """
+    Downloads a job's files in parallel. On the first failure, downloads that haven't
+    started are cancelled and in-flight ones are waited for before the error is raised,
+    so nothing is still writing into the job directory afterwards. Returns the media
+    cache writes to run once the job is done with its inputs.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=MAX_CONCURRENT_DOWNLOADS, thread_name_prefix="job-download"
+    )
+    try:
+        futures = []
+        cache_futures = []
+        for object_name, local_path, cached in downloads:
+            logging.debug("Downloading '%s' to '%s'", object_name, local_path)
+            if cached:
+                future = executor.submit(stage_media_file, storage_service, object_name, local_path)
+                cache_futures.append(future)
+            else:
+                future = executor.submit(
+                    storage_service.download_file_to_temp, object_name, local_path
+                )
+            futures.append(future)
+        for future in as_completed(futures):
+            future.result()
+        return [future.result() for future in cache_futures if future.result() is not None]
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def _cleanup_job_dir(temp_dir: str, download_future: asyncio.Future | None):
+    """
+    Removes a job's directory once no download can still be writing into it, first
+    copying newly downloaded inputs into the media cache.
+    """
+    cache_writes = []
+    if download_future is not None:
+        with suppress(Exception):  # Download errors were already reported by the job
+            cache_writes = await download_future
+    for cache_write in cache_writes:
+        await asyncio.to_thread(cache_write)
+    await asyncio.to_thread(cleanup_temp_dir, temp_dir)
+
+
+async def _list_all_files_with_info() -> list[dict]:
+    """Lists all stored files, reusing a listing taken less than a few seconds ago."""
+    global _listing_cache
+    now = time.monotonic()
+    if _listing_cache is not None and now - _listing_cache[0] < LISTING_CACHE_TTL_SECONDS:
+        logging.debug("Reusing storage listing from %.1f seconds ago.", now - _listing_cache[0])
+        return _listing_cache[1]
+    storage_service = await services.get_storage_service()
+    files = await asyncio.to_thread(storage_service.list_all_files_with_info)
+    _listing_cache = (now, files)
+    return files
+
+
+def _invalidate_listing_cache():
+    """Forgets the cached storage listing after this process writes to storage."""
+    global _listing_cache
+    _listing_cache = None
+
 
 async def analyze_media_files(
     media_filenames: List[str], prompt: str, source_directory: str = "medias"
@@ -49,7 +167,8 @@ async def analyze_media_files(
         len(media_filenames),
         prompt,
     )
-    return await services.llm_service.analyze_media_files(media_filenames, prompt, source_directory)
+    llm_service = await services.get_llm_service()
+    return await llm_service.analyze_media_files(media_filenames, prompt, source_directory)
 
 
 async def list_available_media_files(
@@ -65,12 +184,10 @@ async def list_available_media_files(
             sort_by,
             sort_order,
         )
-        all_files = services.storage_service.list_all_files()
+        all_files = await _list_all_files_with_info()
         logging.debug("Found %d total files in storage.", len(all_files))
 
-        media_files = await categorize_and_enrich_files(
-            services.storage_service, all_files, include_metadata
-        )
+        media_files = categorize_and_enrich_files(all_files, include_metadata)
         logging.debug(
             "Categorized files: %d videos, %d audios, %d images.",
             len(media_files["videos"]),
@@ -97,30 +214,24 @@ async def list_available_media_files(
                 "total_count": len(all_files),
             }
         )
-    except MinioServiceError as e:
+    except StorageServiceError as e:
         logging.exception("Failed to list media files: %s", e)
         return json.dumps({"error": f"Failed to list media files: {str(e)}"})
 
 
 async def read_edit_script(script_file_name: str = "edit.sh") -> str:
     """Reads the content of the edit script."""
-    temp_path = None
     try:
         object_name = f"scripts/{script_file_name}"
         logging.info("Reading script: '%s'", object_name)
-        temp_path = await asyncio.to_thread(
-            services.storage_service.download_file_to_temp, object_name
-        )
-        with open(temp_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        logging.debug("Successfully read %d bytes from '%s'", len(content), object_name)
+        storage_service = await services.get_storage_service()
+        data = await asyncio.to_thread(storage_service.download_file_to_bytes, object_name)
+        content = data.decode("utf-8")
+        logging.debug("Successfully read %d bytes from '%s'", len(data), object_name)
         return json.dumps({"script_content": content})
-    except (MinioServiceError, OSError) as e:
+    except (StorageServiceError, UnicodeDecodeError) as e:
         logging.exception("Failed to read script '%s': %s", script_file_name, e)
         return json.dumps({"error": f"Failed to read script: {str(e)}"})
-    finally:
-        if temp_path:
-            cleanup_temp_files([temp_path])
 
 
 async def modify_edit_script(script_content: str, script_file_name: str = "edit.sh") -> str:
@@ -128,12 +239,14 @@ async def modify_edit_script(script_content: str, script_file_name: str = "edit.
     try:
         object_name = f"scripts/{script_file_name}"
         logging.info("Modifying script: '%s'", object_name)
+        storage_service = await services.get_storage_service()
         await asyncio.to_thread(
-            services.storage_service.upload_file_from_bytes,
+            storage_service.upload_file_from_bytes,
             script_content.encode("utf-8"),
             object_name,
             "text/plain",
         )
+        _invalidate_listing_cache()
         bytes_written = len(script_content.encode("utf-8"))
         logging.info(
             "Successfully wrote %d bytes to '%s'",
@@ -149,7 +262,7 @@ async def modify_edit_script(script_content: str, script_file_name: str = "edit.
                 ),
             }
         )
-    except MinioServiceError as e:
+    except StorageServiceError as e:
         logging.exception("Failed to update script '%s': %s", script_file_name, e)
         return json.dumps({"error": f"Failed to update {script_file_name} script: {str(e)}"})
 
@@ -173,37 +286,39 @@ async def execute_edit_script(
     )
     temp_dir = tempfile.mkdtemp()
     logging.debug("Created temporary directory: %s", temp_dir)
-    local_input_paths = []
-    local_script_path = None
     output_filename = os.path.basename(output_filepath)
     local_output_path = os.path.join(temp_dir, output_filename)
+    download_future = None
 
     try:
-        # Download input files
-        logging.info("Downloading input files...")
-        for file_name in input_files:
-            object_name = f"medias/{file_name}"
-            local_path = os.path.join(temp_dir, file_name)
-            logging.debug("Downloading '%s' to '%s'", object_name, local_path)
-            await asyncio.to_thread(
-                services.storage_service.download_file_to_temp, object_name, local_path
-            )
-            local_input_paths.append(local_path)
-        logging.info("Downloaded %d input files.", len(local_input_paths))
-
-        # Download and prepare the script
-        logging.info("Downloading script '%s'...", script_file_name)
-        script_object_name = f"scripts/{script_file_name}"
+        storage_service = await services.get_storage_service()
+        # Download input files and the script concurrently
+        logging.info("Downloading input files and script '%s'...", script_file_name)
+        local_input_paths = [os.path.join(temp_dir, file_name) for file_name in input_files]
         local_script_path = os.path.join(temp_dir, script_file_name)
-        await asyncio.to_thread(
-            services.storage_service.download_file_to_temp,
-            script_object_name,
-            local_script_path,
+        # Media inputs go through the local media cache; the script is always fresh
+        downloads = [
+            (f"medias/{file_name}", local_path, True)
+            for file_name, local_path in zip(input_files, local_input_paths)
+        ]
+        downloads.append((f"scripts/{script_file_name}", local_script_path, False))
+        download_future = asyncio.get_running_loop().run_in_executor(
+            None, _download_job_files, storage_service, downloads
         )
-        logging.debug("Downloaded script to '%s'", local_script_path)
+        # Shielded so that if this call is cancelled, cleanup still waits for the downloads
+        await asyncio.shield(download_future)
+        logging.info("Downloaded %d input files and the script.", len(local_input_paths))
         os.chmod(local_script_path, 0o755)  # Make script executable
         logging.debug("Made script '%s' executable.", local_script_path)
 
+        # The deadline scales with how much media the script has to process
+        timeout = None
+        if SCRIPT_TIMEOUT_SECONDS_PER_MEDIA_SECOND > 0:
+            durations = await asyncio.gather(*map(probe_media_duration, local_input_paths))
+            timeout = max(
+                MIN_SCRIPT_TIMEOUT_SECONDS, sum(durations) * SCRIPT_TIMEOUT_SECONDS_PER_MEDIA_SECOND
+            )
+
         # Execute the script
         cmd = (
             ["bash", local_script_path]
@@ -213,45 +328,61 @@ async def execute_edit_script(
         logging.info("Executing command: %s", " ".join(cmd))
         process = await asyncio.create_subprocess_exec(
             *cmd,
+            # stdin is the MCP stdio channel; ffmpeg in the script must not read from it
+            stdin=asyncio.subprocess.DEVNULL,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
             cwd=temp_dir,
+            start_new_session=True,  # Own process group, so a timeout can kill ffmpeg too
+        )
+        output_tails = asyncio.gather(
+            read_stream_tail(process.stdout, MAX_SCRIPT_OUTPUT_BYTES),
+            read_stream_tail(process.stderr, MAX_SCRIPT_OUTPUT_BYTES),
         )
-        stdout, stderr = await process.communicate()
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+            _, stderr_tail = await output_tails
+            stderr = stderr_tail.decode(errors="replace")
+            logging.error("Script '%s' timed out after %.0f seconds.", script_file_name, timeout)
+            logging.error("Stderr: %s", stderr)
+            return json.dumps(
+                {
+                    "success": False,
+                    "error": f"Script execution timed out after {timeout:.0f} seconds.",
+                    "stderr": stderr,
+                }
+            )
+        stdout_tail, stderr_tail = await output_tails
+        stdout = stdout_tail.decode(errors="replace")
+        stderr = stderr_tail.decode(errors="replace")
 
         if process.returncode == 0:
             logging.info("Script executed successfully. Uploading output file...")
             # Upload the output file
             await asyncio.to_thread(
-                services.storage_service.upload_file_from_path,
+                storage_service.upload_file_from_path,
                 local_output_path,
                 output_filepath,
                 "video/mp4",
             )
+            _invalidate_listing_cache()
             logging.info("Successfully uploaded '%s'", output_filepath)
             return json.dumps(
-                {"success": True, "output": stdout.decode(), "output_file": output_filepath}
+                {"success": True, "output": stdout, "output_file": output_filepath}
             )
         else:
             logging.error("Script execution failed with return code %d.", process.returncode)
-            logging.error("Stderr: %s", stderr.decode())
-            logging.error("Stdout: %s", stdout.decode())
-            return json.dumps(
-                {"success": False, "error": stderr.decode(), "stdout": stdout.decode()}
-            )
-    except (MinioServiceError, OSError) as e:
+            logging.error("Stderr: %s", stderr)
+            logging.error("Stdout: %s", stdout)
+            return json.dumps({"success": False, "error": stderr, "stdout": stdout})
+    except (StorageServiceError, OSError) as e:
         logging.exception("Failed to execute script due to an exception.")
         return json.dumps({"success": False, "error": f"Failed to execute script: {str(e)}"})
     finally:
-        # Cleanup all temporary files
-        logging.info("Cleaning up temporary files...")
-        all_temp_files = (
-            local_input_paths
-            + ([local_script_path] if local_script_path else [])
-            + [local_output_path]
-        )
-        cleanup_temp_files(all_temp_files)
-        if os.path.exists(temp_dir):
-            logging.debug("Removing temporary directory: %s", temp_dir)
-            os.rmdir(temp_dir)
-        logging.info("Cleanup complete.")
+        # Cleanup all temporary files in the background, off the response path
+        task = asyncio.create_task(_cleanup_job_dir(temp_dir, download_future))
+        _background_tasks.add(task)
+        task.add_done_callback(_on_background_task_done)
@@ -2,61 +2,60 @@
 
 import asyncio
 import logging
+import mimetypes
 import os
+import shutil
 from typing import Any, Dict, List
 
-from interfaces.storage_service_interface import StorageService
-from services.minio_storage_service import MinioServiceError
+VIDEO_EXTENSIONS = frozenset({".mp4", ".mov", ".avi", ".mkv", ".webm", ".flv", ".wmv"})
+AUDIO_EXTENSIONS = frozenset({".mp3", ".wav", ".aac", ".flac", ".ogg", ".m4a", ".wma"})
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"})
 
-VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".flv", ".wmv")
-AUDIO_EXTENSIONS = (".mp3", ".wav", ".aac", ".flac", ".ogg", ".m4a", ".wma")
-IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff")
 
-
-async def get_file_metadata(storage_service: StorageService, object_name: str) -> Dict[str, Any]:
-    """Fetches and formats metadata for a given file."""
-    file_info = await asyncio.to_thread(storage_service.get_file_info, object_name)
+def format_file_metadata(file_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Formats the listing information of a file as media metadata."""
+    filename = os.path.basename(file_info["object_name"])
     return {
-        "filename": os.path.basename(object_name),
+        "filename": filename,
         "size_bytes": file_info["size"],
         "size_mb": round(file_info["size"] / (1024 * 1024), 2),
         "last_modified": file_info["last_modified"].isoformat(),
-        "content_type": file_info["content_type"],
+        "content_type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
         "etag": file_info["etag"],
     }
 
 
-async def categorize_and_enrich_files(
-    storage_service: StorageService,
-    files: List[str],
+def categorize_and_enrich_files(
+    files: List[Dict[str, Any]],
     include_metadata: bool,
 ) -> Dict[str, List[Any]]:
-    """Categorizes files into videos, audios, and images, optionally fetching metadata."""
+    """
+    Categorizes listed files into videos, audios, and images, optionally including
+    their metadata. Metadata comes from the listing itself, so no per-file request
+    is made.
+    """
     categorized_files: Dict[str, List[Any]] = {"videos": [], "audios": [], "images": []}
 
-    async def process_file(file_path: str):
-        """Helper to process a single file."""
-        base_filename = os.path.basename(file_path)
+    for file_info in files:
+        base_filename = os.path.basename(file_info["object_name"])
         file_ext = os.path.splitext(base_filename)[1].lower()
 
+        if file_ext in VIDEO_EXTENSIONS:
+            category = "videos"
+        elif file_ext in AUDIO_EXTENSIONS:
+            category = "audios"
+        elif file_ext in IMAGE_EXTENSIONS:
+            category = "images"
+        else:
+            continue
+
         media_info: Any
         if include_metadata:
-            try:
-                media_info = await get_file_metadata(storage_service, file_path)
-            except MinioServiceError as e:
-                logging.warning("Could not get metadata for %s: %s", base_filename, e)
-                media_info = {"filename": base_filename, "error": str(e)}
+            media_info = format_file_metadata(file_info)
         else:
             media_info = base_filename
+        categorized_files[category].append(media_info)
 
-        if file_ext in VIDEO_EXTENSIONS:
-            categorized_files["videos"].append(media_info)
-        elif file_ext in AUDIO_EXTENSIONS:
-            categorized_files["audios"].append(media_info)
-        elif file_ext in IMAGE_EXTENSIONS:
-            categorized_files["images"].append(media_info)
-
-    await asyncio.gather(*(process_file(file) for file in files))
     return categorized_files
 
 
@@ -85,11 +84,47 @@ def sort_media_files(
     return media
 
 
-def cleanup_temp_files(temp_files: List[str]):
-    """Deletes a list of temporary files."""
-    for temp_file in temp_files:
-        try:
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
-        except OSError as e:
-            logging.warning("Failed to delete temp file %s: %s", temp_file, e)
+def cleanup_temp_dir(temp_dir: str):
+    """
+    Deletes a temporary directory with everything in it, including any
+    intermediate files a script created next to its inputs.
+    """
+    logging.info("Cleaning up temporary directory: %s", temp_dir)
+    try:
+        shutil.rmtree(temp_dir)
+    except OSError as e:
+        logging.warning("Failed to delete temp directory %s: %s", temp_dir, e)
+        return
+    logging.info("Cleanup complete.")
+
+
+async def probe_media_duration(path: str) -> float:
+    """Returns the duration of a media file in seconds, or 0 if it has none or can't be probed."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            path,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+        return float(stdout)
+    except (OSError, ValueError):
+        return 0.0
+
+
+async def read_stream_tail(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Reads a stream until EOF, keeping only its last `limit` bytes."""
+    tail = bytearray()
+    while chunk := await stream.read(64 * 1024):
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:-limit]
+    return bytes(tail)
@@ -3,22 +3,57 @@ Main entry point for the Video Upload API
 Simple FastAPI server for uploading videos to Docker container
 """
 
-import io
+import asyncio
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, File, Query, UploadFile
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
-from minio.error import S3Error
 from minio_service import (
     delete_media_file,
+    ensure_bucket_exists,
     get_file_url,
     get_media_file,
+    get_storage_status,
     list_media_files,
-    minio_client,
     save_media_file,
 )
+from urllib3.exceptions import MaxRetryError
+
+# Content types served for downloads, keyed by file extension
+CONTENT_TYPES = {
+    "mp4": "video/mp4",
+    "mov": "video/quicktime",
+    "avi": "video/x-msvideo",
+    "mkv": "video/x-matroska",
+    "webm": "video/webm",
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "ogg": "audio/ogg",
+    "m4a": "audio/mp4",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "bmp": "image/bmp",
+    "tiff": "image/tiff",
+}
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Warms up storage so the first request doesn't pay for the bucket check."""
+    try:
+        await asyncio.to_thread(ensure_bucket_exists)
+    except (HTTPException, MaxRetryError):
+        # MinIO not reachable yet; the first upload will retry the check
+        pass
+    yield
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -46,7 +81,7 @@ async def list_media_endpoint():
     """
     Endpoint to list all media files (videos and audio).
     """
-    result = list_media_files()
+    result = await asyncio.to_thread(list_media_files)
     return JSONResponse(status_code=200, content=result)
 
 
@@ -55,7 +90,7 @@ async def upload_media_endpoint(file: UploadFile = File(...)):
     """
     Endpoint to upload a video or audio file.
     """
-    result = save_media_file(file)
+    result = await asyncio.to_thread(save_media_file, file)
     return JSONResponse(status_code=201, content=result)
 
 
@@ -64,19 +99,19 @@ async def delete_media_endpoint(filename: str, source: str = Query("medias")):
     """
     Endpoint to delete a video or audio file.
     """
-    result = delete_media_file(filename, source)
+    result = await asyncio.to_thread(delete_media_file, filename, source)
     return JSONResponse(status_code=200, content=result)
 
 
 @app.get("/api/v1/container/status")
-async def container_status_endpoint():
+async def container_status_endpoint(force: bool = Query(False)):
     """
     Endpoint to get container status by checking MinIO connectivity.
+    The check result is cached briefly; pass force=true to bypass the cache.
     """
-    try:
-        # Try to list buckets to verify MinIO connectivity
-        minio_client.list_buckets()
+    storage_accessible, storage_error = await asyncio.to_thread(get_storage_status, force)
 
+    if storage_accessible:
         return JSONResponse(
             status_code=200,
             content={
@@ -87,17 +122,16 @@ async def container_status_endpoint():
                 "storage_type": "MinIO",
             },
         )
-    except S3Error as minio_error:
-        return JSONResponse(
-            status_code=200,
-            content={
-                "container_running": False,
-                "container_id": "agent",
-                "message": f"Agent container may not be running (MinIO not accessible: {str(minio_error)})",
-                "container_name": "agent",
-                "storage_type": "MinIO",
-            },
-        )
+    return JSONResponse(
+        status_code=200,
+        content={
+            "container_running": False,
+            "container_id": "agent",
+            "message": f"Agent container may not be running (MinIO not accessible: {storage_error})",
+            "container_name": "agent",
+            "storage_type": "MinIO",
+        },
+    )
 
 
 @app.get("/api/v1/download/{filename}")
@@ -105,33 +139,14 @@ async def download_video_endpoint(filename: str, source: str = Query("medias")):
     """
     Endpoint to download a video or audio file from MinIO storage.
     """
-    file_data = get_media_file(filename, source)
+    file_stream = await asyncio.to_thread(get_media_file, filename, source)
 
     # Determine content type based on file extension
     file_extension = filename.lower().split(".")[-1]
-    content_type_map = {
-        "mp4": "video/mp4",
-        "mov": "video/quicktime",
-        "avi": "video/x-msvideo",
-        "mkv": "video/x-matroska",
-        "webm": "video/webm",
-        "mp3": "audio/mpeg",
-        "wav": "audio/wav",
-        "aac": "audio/aac",
-        "flac": "audio/flac",
-        "ogg": "audio/ogg",
-        "m4a": "audio/mp4",
-        "jpg": "image/jpeg",
-        "jpeg": "image/jpeg",
-        "png": "image/png",
-        "gif": "image/gif",
-        "bmp": "image/bmp",
-        "tiff": "image/tiff",
-    }
-    content_type = content_type_map.get(file_extension, "application/octet-stream")
+    content_type = CONTENT_TYPES.get(file_extension, "application/octet-stream")
 
     return StreamingResponse(
-        io.BytesIO(file_data),
+        file_stream,
         media_type=content_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
@@ -144,5 +159,5 @@ async def get_media_url_endpoint(
     """
     Endpoint to get a presigned URL for downloading a media file.
     """
-    url = get_file_url(filename, source, expires)
+    url = await asyncio.to_thread(get_file_url, filename, source, expires)
     return JSONResponse(status_code=200, content={"url": url, "expires_in_seconds": expires})
@@ -2,12 +2,15 @@
 MinIO service for handling video and audio file operations with S3-compatible storage.
 """
 
-import io
 import os
+import threading
+import time
+from typing import Iterator
 
 from fastapi import HTTPException, UploadFile
 from minio import Minio
 from minio.error import S3Error
+from urllib3.exceptions import MaxRetryError
 
 # MinIO configuration
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
@@ -15,11 +18,30 @@ MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin123")
 MINIO_BUCKET_NAME = os.getenv("MINIO_BUCKET_NAME", "video-storage")
 
+# Size of the chunks yielded when streaming downloads to clients
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Multipart upload part size; larger parts mean fewer round-trips for big videos
+MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", str(64 * 1024 * 1024)))
+
+# How long a storage status check result is reused before MinIO is queried again
+STATUS_CACHE_TTL_SECONDS = 2.0
+
 # File type validation
-ALLOWED_VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".flv", ".wmv"}
-ALLOWED_AUDIO_EXTENSIONS = {".mp3", ".wav", ".aac", ".flac", ".ogg", ".m4a", ".wma"}
-ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"}
+ALLOWED_VIDEO_EXTENSIONS = frozenset({".mp4", ".mov", ".avi", ".mkv", ".webm", ".flv", ".wmv"})
+ALLOWED_AUDIO_EXTENSIONS = frozenset({".mp3", ".wav", ".aac", ".flac", ".ogg", ".m4a", ".wma"})
+ALLOWED_IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff"})
 ALLOWED_EXTENSIONS = ALLOWED_VIDEO_EXTENSIONS | ALLOWED_AUDIO_EXTENSIONS | ALLOWED_IMAGE_EXTENSIONS
+INVALID_FILE_TYPE_DETAIL = (
+    f"Invalid file type. Allowed extensions are: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
+)
+
+# Source name -> object prefix in the bucket
+_SOURCE_MAP = {
+    "medias": "medias/",
+    "results": "results/",
+    "temp": "temp/",
+}
 
 # Initialize MinIO client
 minio_client = Minio(
@@ -29,14 +51,74 @@ minio_client = Minio(
     secure=False,  # Set to True for HTTPS
 )
 
+# Bucket existence is checked once per process, see ensure_bucket_exists()
+_bucket_ready = False
+_bucket_lock = threading.Lock()
+
+# Last storage status check as (monotonic timestamp, accessible, error message)
+_status_cache: tuple[float, bool, str] | None = None
+_status_check_running = False
+_status_lock = threading.Lock()
+
+
+def _get_object_name(filename: str, source: str) -> str:
+    """Resolves a filename within a source to its object name in the bucket."""
+    prefix = _SOURCE_MAP.get(source)
+    if prefix is None:
+        raise HTTPException(status_code=400, detail="Invalid source")
+    return prefix + filename
+
 
 def ensure_bucket_exists():
-    """Ensure the bucket exists, create it if it doesn't."""
+    """
+    Ensure the bucket exists, create it if it doesn't.
+    The check only hits MinIO until it has succeeded once per process.
+    """
+    global _bucket_ready
+    if _bucket_ready:
+        return
+
+    with _bucket_lock:
+        if _bucket_ready:
+            return
+        try:
+            if not minio_client.bucket_exists(MINIO_BUCKET_NAME):
+                minio_client.make_bucket(MINIO_BUCKET_NAME)
+        except S3Error as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to create bucket: {str(e)}"
+            ) from e
+        _bucket_ready = True
+
+
+def get_storage_status(force: bool = False) -> tuple[bool, str]:
+    """
+    Checks whether MinIO is accessible, returning (accessible, error message).
+    Results are reused for STATUS_CACHE_TTL_SECONDS unless force is set, and
+    callers arriving while a check is running get the previous result instead of
+    waiting on MinIO.
+    """
+    global _status_cache, _status_check_running
+    with _status_lock:
+        if not force and _status_cache is not None and (
+            _status_check_running
+            or time.monotonic() - _status_cache[0] < STATUS_CACHE_TTL_SECONDS
+        ):
+            return _status_cache[1], _status_cache[2]
+        _status_check_running = True
+
     try:
-        if not minio_client.bucket_exists(MINIO_BUCKET_NAME):
-            minio_client.make_bucket(MINIO_BUCKET_NAME)
-    except S3Error as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create bucket: {str(e)}") from e
+        minio_client.list_buckets()
+        accessible, error = True, ""
+    except (S3Error, MaxRetryError) as e:
+        accessible, error = False, str(e)
+    finally:
+        with _status_lock:
+            _status_check_running = False
+
+    with _status_lock:
+        _status_cache = (time.monotonic(), accessible, error)
+    return accessible, error
 
 
 def save_media_file(file: UploadFile) -> dict:
@@ -47,7 +129,7 @@ def save_media_file(file: UploadFile) -> dict:
     if file_extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Allowed extensions are: {', '.join(ALLOWED_EXTENSIONS)}",
+            detail=INVALID_FILE_TYPE_DETAIL,
         )
 
     # Check if file already exists
@@ -65,15 +147,18 @@ def save_media_file(file: UploadFile) -> dict:
 
     # Upload file to MinIO
     try:
-        file_data = file.file.read()
-        file.file.seek(0)  # Reset file pointer
+        # The spooled upload is seekable, so its size can be read without copying it
+        file.file.seek(0, os.SEEK_END)
+        file_size = file.file.tell()
+        file.file.seek(0)
 
         minio_client.put_object(
             MINIO_BUCKET_NAME,
             f"medias/{file.filename}",
-            io.BytesIO(file_data),
-            length=len(file_data),
+            file.file,
+            length=file_size,
             content_type=file.content_type or "application/octet-stream",
+            part_size=MINIO_PART_SIZE,
         )
 
         file_type = "video"
@@ -91,17 +176,7 @@ def delete_media_file(filename: str, source: str = "medias") -> dict:
     """
     Deletes a video or audio file from MinIO storage.
     """
-    # Map source to object prefix
-    source_map = {
-        "medias": "medias/",
-        "results": "results/",
-        "temp": "temp/",
-    }
-
-    if source not in source_map:
-        raise HTTPException(status_code=400, detail="Invalid source")
-
-    object_name = f"{source_map[source]}{filename}"
+    object_name = _get_object_name(filename, source)
 
     try:
         minio_client.remove_object(MINIO_BUCKET_NAME, object_name)
@@ -124,26 +199,21 @@ def list_media_files() -> dict:
 
         for obj in objects:
             # Extract directory and filename
-            path_parts = obj.object_name.split("/")
-            if len(path_parts) < 2:
+            directory, separator, path = obj.object_name.partition("/")
+            if not separator:
                 continue
 
-            directory = path_parts[0]
-            filename = path_parts[-1]
+            filename = path.rpartition("/")[2]
 
             # Skip if it's a directory marker
             if not filename:
                 continue
 
-            file_extension = os.path.splitext(filename)[1].lower()
-
             if directory == "medias":
-                if file_extension in ALLOWED_EXTENSIONS:
+                if os.path.splitext(filename)[1].lower() in ALLOWED_EXTENSIONS:
                     result["medias"].append(filename)
-            elif directory == "results":
-                result["results"].append(filename)
-            elif directory == "temp":
-                result["temp"].append(filename)
+            elif directory in result:
+                result[directory].append(filename)
 
     except S3Error as e:
         raise HTTPException(status_code=500, detail=f"Failed to list files: {str(e)}") from e
@@ -151,46 +221,39 @@ def list_media_files() -> dict:
     return result
 
 
-def get_media_file(filename: str, source: str = "medias") -> bytes:
+def get_media_file(filename: str, source: str = "medias") -> Iterator[bytes]:
     """
-    Downloads a media file from MinIO storage.
+    Opens a media file in MinIO storage and returns an iterator over its content.
+    The object is requested eagerly so that lookup errors surface before streaming
+    starts; the underlying connection is released once the iterator is exhausted
+    or closed.
     """
-    # Map source to object prefix
-    source_map = {
-        "medias": "medias/",
-        "results": "results/",
-        "temp": "temp/",
-    }
-
-    if source not in source_map:
-        raise HTTPException(status_code=400, detail="Invalid source")
-
-    object_name = f"{source_map[source]}{filename}"
+    object_name = _get_object_name(filename, source)
 
     try:
         response = minio_client.get_object(MINIO_BUCKET_NAME, object_name)
-        return response.read()
     except S3Error as e:
         if e.code == "NoSuchKey":
             raise HTTPException(status_code=404, detail="Media file not found") from e
         raise HTTPException(status_code=500, detail=f"Failed to download file: {str(e)}") from e
 
+    return _stream_object(response)
+
+
+def _stream_object(response) -> Iterator[bytes]:
+    """Yields chunks from a MinIO response, releasing the connection afterwards."""
+    try:
+        yield from response.stream(DOWNLOAD_CHUNK_SIZE)
+    finally:
+        response.close()
+        response.release_conn()
+
 
 def get_file_url(filename: str, source: str = "medias", expires_in_seconds: int = 3600) -> str:
     """
     Generates a presigned URL for downloading a file from MinIO.
     """
-    # Map source to object prefix
-    source_map = {
-        "medias": "medias/",
-        "results": "results/",
-        "temp": "temp/",
-    }
-
-    if source not in source_map:
-        raise HTTPException(status_code=400, detail="Invalid source")
-
-    object_name = f"{source_map[source]}{filename}"
+    object_name = _get_object_name(filename, source)
 
     try:
         url = minio_client.presigned_get_object(
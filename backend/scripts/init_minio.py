@@ -5,8 +5,11 @@ Run this after MinIO is up and running.
 """
 
 import os
+import socket
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from minio import Minio
 from minio.error import S3Error
@@ -18,63 +21,91 @@ MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin123")
 MINIO_BUCKET_NAME = os.getenv("MINIO_BUCKET_NAME", "video-storage")
 
+# Maximum number of scripts uploaded in parallel
+MAX_UPLOAD_WORKERS = 8
+
 
 class MinioNotReadyError(Exception):
     """Custom exception for when MinIO is not ready."""
 
 
-def wait_for_minio(max_retries=20, initial_delay=1, max_delay=5):
+def minio_port_open(timeout=0.5):
+    """Check whether MinIO accepts TCP connections, without making an HTTP request."""
+    host, _, port = MINIO_ENDPOINT.partition(":")
+    try:
+        with socket.create_connection((host, int(port or 80)), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def wait_for_minio(max_retries=50, initial_delay=0.1, max_delay=2):
     """Wait for MinIO to be available with exponential backoff."""
     print(f"Waiting for MinIO to be available at {MINIO_ENDPOINT}...")
 
+    # One client (and connection pool) is reused across attempts and for the uploads
+    client = Minio(
+        MINIO_ENDPOINT,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        secure=False,
+    )
     for attempt in range(max_retries):
-        try:
-            client = Minio(
-                MINIO_ENDPOINT,
-                access_key=MINIO_ACCESS_KEY,
-                secret_key=MINIO_SECRET_KEY,
-                secure=False,
-            )
-            client.list_buckets()
-            print("MinIO is available!")
-            return client
-        except (S3Error, MaxRetryError) as e:
-            print(f"Attempt {attempt + 1}/{max_retries}: MinIO not ready yet ({e})")
-            if attempt < max_retries - 1:
-                # Exponential backoff with jitter
-                delay = min(initial_delay * (2**attempt), max_delay)
-                time.sleep(delay)
-            else:
-                raise MinioNotReadyError(f"MinIO not available after {max_retries} attempts") from e
+        # A cheap TCP probe first; the API is only queried once the port is open
+        if not minio_port_open():
+            reason = "port not open"
+        else:
+            try:
+                client.list_buckets()
+                print("MinIO is available!")
+                return client
+            except (S3Error, MaxRetryError) as e:
+                reason = e
+        print(f"Attempt {attempt + 1}/{max_retries}: MinIO not ready yet ({reason})")
+        if attempt < max_retries - 1:
+            # Exponential backoff
+            time.sleep(min(initial_delay * (2**attempt), max_delay))
+
+    raise MinioNotReadyError(f"MinIO not available after {max_retries} attempts")
+
+
+def upload_script(client, script_path):
+    """Upload a single script to MinIO."""
+    script_file = os.path.basename(script_path)
+    try:
+        client.fput_object(
+            MINIO_BUCKET_NAME,
+            f"scripts/{script_file}",
+            script_path,
+            content_type="text/plain",
+        )
+        print(f"Uploaded {script_file} to MinIO")
+    except (S3Error, OSError) as e:
+        print(f"Failed to upload {script_file}: {e}")
 
 
 def upload_default_scripts(client):
     """Upload default scripts to MinIO."""
     scripts_dir = "/app/storage"
 
-    if not os.path.exists(scripts_dir):
+    try:
+        # Every shell script shipped in the storage directory is a default script
+        with os.scandir(scripts_dir) as entries:
+            script_paths = [
+                entry.path for entry in entries if entry.is_file() and entry.name.endswith(".sh")
+            ]
+    except FileNotFoundError:
         print(f"Scripts directory not found: {scripts_dir}")
         return
 
-    script_files = ["edit.sh"]
+    if not script_paths:
+        print(f"No scripts found in {scripts_dir}")
+        return
 
-    for script_file in script_files:
-        script_path = os.path.join(scripts_dir, script_file)
-        if os.path.exists(script_path):
-            try:
-                with open(script_path, "rb") as file_data:
-                    client.put_object(
-                        MINIO_BUCKET_NAME,
-                        f"scripts/{script_file}",
-                        file_data,
-                        length=os.path.getsize(script_path),
-                        content_type="text/plain",
-                    )
-                print(f"Uploaded {script_file} to MinIO")
-            except (S3Error, OSError) as e:
-                print(f"Failed to upload {script_file}: {e}")
-        else:
-            print(f"Script file not found: {script_path}")
+    # Uploads are independent, so overlap their round trips; consuming the results
+    # re-raises any unexpected error from a worker instead of dropping it
+    with ThreadPoolExecutor(max_workers=min(MAX_UPLOAD_WORKERS, len(script_paths))) as executor:
+        list(executor.map(partial(upload_script, client), script_paths))
 
 
 def main():
@@ -95,7 +126,7 @@ def main():
 
         print("MinIO initialization completed successfully!")
 
-    except (S3Error, MinioNotReadyError) as e:
+    except (S3Error, MaxRetryError, MinioNotReadyError) as e:
         print(f"MinIO initialization failed: {e}")
         sys.exit(1)
 
@@ -11,13 +11,77 @@ inputs=("${@:1:$#-1}")
 # The last argument is the output
 output="${!#}"
 
-# Build ffmpeg command
-cmd="ffmpeg"
+# Output video codec as named by ffprobe: h264 (default) or hevc
+video_codec_name="${VIDEO_CODEC:-h264}"
+
+# Print the codec of the first video ("v") or audio ("a") stream of a file
+probe_codec() {
+    ffprobe -v error -select_streams "$2:0" -show_entries stream=codec_name -of csv=p=0 "$1"
+}
+
+# A single input that is already in the output codecs only needs remuxing, not re-encoding
+if [ "${#inputs[@]}" -eq 1 ] \
+    && [ "$(probe_codec "${inputs[0]}" v)" = "$video_codec_name" ] \
+    && [ "$(probe_codec "${inputs[0]}" a)" = "aac" ]; then
+    if ffmpeg -i "${inputs[0]}" -map 0:v -map 0:a -c copy -movflags +faststart "$output"; then
+        exit 0
+    fi
+    # Some containers can't be stream-copied into MP4; fall back to re-encoding below
+    rm -f "$output"
+fi
+
+# Print, as "video.key=value" and "audio.key=value" lines, every stream parameter that
+# must be identical for inputs to be joined without re-encoding
+stream_signature() {
+    ffprobe -v error -select_streams v:0 -show_data_hash sha256 \
+        -show_entries stream=codec_name,profile,level,width,height,pix_fmt,sample_aspect_ratio,r_frame_rate,time_base,extradata_hash \
+        -of default=noprint_wrappers=1 "$1" | sed 's/^/video./'
+    ffprobe -v error -select_streams a:0 -show_data_hash sha256 \
+        -show_entries stream=codec_name,profile,sample_rate,channels,time_base,extradata_hash \
+        -of default=noprint_wrappers=1 "$1" | sed 's/^/audio./'
+}
+
+# Inputs that already match the re-encoded output (output codecs, 1920x1080, square
+# pixels) and have identical stream parameters can be joined with the concat demuxer,
+# which only rewrites the container
+if [ "${#inputs[@]}" -gt 1 ]; then
+    signature="$(stream_signature "${inputs[0]}")"
+    can_copy=true
+    for required in "video.codec_name=$video_codec_name" video.width=1920 video.height=1080 \
+        video.sample_aspect_ratio=1:1 audio.codec_name=aac; do
+        if ! grep -qxF "$required" <<< "$signature"; then
+            can_copy=false
+            break
+        fi
+    done
+    for input in "${inputs[@]:1}"; do
+        if ! $can_copy || [ "$(stream_signature "$input")" != "$signature" ]; then
+            can_copy=false
+            break
+        fi
+    done
+
+    if $can_copy; then
+        list_file="$(mktemp)"
+        trap 'rm -f "$list_file"' EXIT
+        for input in "${inputs[@]}"; do
+            printf "file '%s'\n" "$(realpath "$input" | sed "s/'/'\\\\''/g")" >> "$list_file"
+        done
+        if ffmpeg -f concat -safe 0 -i "$list_file" -c copy -movflags +faststart "$output"; then
+            exit 0
+        fi
+        # Fall back to re-encoding below
+        rm -f "$output"
+    fi
+fi
+
+# Build ffmpeg command as an argument list so filenames are never re-parsed
+cmd=(ffmpeg)
 filter_complex=""
 concat_inputs=""
 
 for i in "${!inputs[@]}"; do
-    cmd+=" -i \"${inputs[$i]}\""
+    cmd+=(-i "${inputs[$i]}")
     filter_complex+="[$i:v]scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1[v$i]; "
     concat_inputs+="[v$i][${i}:a]"
 done
@@ -25,13 +89,30 @@ done
 # Check if there's more than one input to concatenate
 if [ "${#inputs[@]}" -gt 1 ]; then
     filter_complex+="${concat_inputs}concat=n=${#inputs[@]}:v=1:a=1[v][a]"
-    cmd+=" -filter_complex \"$filter_complex\" -map \"[v]\" -map \"[a]\""
+    cmd+=(-filter_complex "$filter_complex" -map "[v]" -map "[a]")
 else
     # If only one input, just map it directly without concat
-    cmd+=" -map 0:v -map 0:a"
+    cmd+=(-map 0:v -map 0:a)
+fi
+
+if [ "$video_codec_name" = "hevc" ]; then
+    # Wavefront and frame-level parallelism let x265 scale across cores; more than
+    # 4 frame threads costs quality for little extra speed
+    cores="$(nproc)"
+    frame_threads=$((cores < 4 ? cores : 4))
+    video_codec=(-c:v libx265 -crf 28 -preset fast -tag:v hvc1
+        -x265-params "wpp=1:pmode=1:pme=1:frame-threads=$frame_threads")
+# Use the GPU's hardware encoder when a GPU is present and ffmpeg was built with NVENC
+elif command -v nvidia-smi > /dev/null 2>&1 && nvidia-smi > /dev/null 2>&1 \
+    && ffmpeg -hide_banner -encoders 2> /dev/null | grep -q h264_nvenc; then
+    video_codec=(-c:v h264_nvenc -preset p1 -rc vbr -cq 23 -b:v 0)
+else
+    # X264_PRESET trades file size for speed (e.g. ultrafast for quick previews)
+    video_codec=(-c:v libx264 -crf 23 -preset "${X264_PRESET:-veryfast}")
 fi
 
-cmd+=" -c:v libx264 -crf 23 -preset veryfast -c:a aac -b:a 192k \"$output\""
+# faststart moves the index to the front so players can start before the download ends
+cmd+=("${video_codec[@]}" -c:a aac -b:a 192k -movflags +faststart "$output")
 
 # Execute the command
-eval $cmd
+"${cmd[@]}"